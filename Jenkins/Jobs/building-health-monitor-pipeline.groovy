@@ -28,6 +28,7 @@ pipeline {
                 script {
                     echo 'Training/Retraining ML model...'
                     sh "docker run --rm -v ${PWD}/${APP_DIR}:/app ${APP_IMAGE_NAME} python /app/model_trainer.py"
+                    sh "docker run --rm -v ${PWD}/${APP_DIR}:/app ${APP_IMAGE_NAME} python /app/model_compiler.py"
                 }
             }
         }
@@ -37,7 +38,7 @@ pipeline {
                     echo 'Deploying updated application...'
                     sh "docker stop ${APP_CONTAINER_NAME} || true"
                     sh "docker rm ${APP_CONTAINER_NAME} || true"
-                    sh "docker run -d -p 5000:5000 --name ${APP_CONTAINER_NAME} -v ${PWD}/${APP_DIR}:/app ${APP_IMAGE_NAME} gunicorn -b 0.0.0.0:5000 app:app"
+                    sh "docker run -d -p 5000:5000 --name ${APP_CONTAINER_NAME} -v ${PWD}/${APP_DIR}:/app ${APP_IMAGE_NAME} gunicorn -c gunicorn.conf.py app:app"
                     echo 'Application deployed successfully!'
                 }
             }
@@ -1,16 +1,52 @@
-from flask import Flask, request, jsonify, render_template_string
-import pandas as pd
+from flask import Flask, Response, g, request, jsonify
 import numpy as np
-import pickle
+import msgspec
+import orjson
+import bisect
+import gzip
+import hashlib
+import joblib
+import logging
 import os
+import queue
+import sys
 import threading
 import time
-from prometheus_client import generate_latest, Counter, Gauge, Histogram, make_wsgi_app
+from collections import deque
+from functools import lru_cache
+from typing import Annotated
+from logging.handlers import QueueHandler, QueueListener
+from prometheus_client import generate_latest, CollectorRegistry, Counter, Gauge, Histogram, make_wsgi_app, multiprocess
 from werkzeug.middleware.dispatcher import DispatcherMiddleware
 
+try:
+    import tl2cgen
+except ImportError:
+    tl2cgen = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 app = Flask(__name__)
 
-MODEL_PATH = 'model.pkl'
+# Request threads only enqueue log records; a listener thread writes them out.
+logger = logging.getLogger('building_health_monitor')
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+def start_log_listener():
+    log_queue = queue.Queue(-1)
+    logger.handlers[:] = [QueueHandler(log_queue)]
+    QueueListener(log_queue, logging.StreamHandler(sys.stdout)).start()
+
+start_log_listener()
+os.register_at_fork(after_in_child=start_log_listener)
+
+MODEL_PATH = os.getenv('MODEL_PATH', 'model.joblib')
+# The compiled predictor sits next to the model it was built from.
+PREDICTOR_PATH = os.path.splitext(MODEL_PATH)[0] + '.so'
 
 DATA_POINTS_RECEIVED = Counter(
     'data_points_received_total',
@@ -24,7 +60,8 @@ ANOMALIES_DETECTED = Counter(
 
 ACTIVE_ANOMALIES = Gauge(
     'active_anomalies',
-    'Current number of active anomalies being reported'
+    'Current number of active anomalies being reported',
+    multiprocess_mode='livesum'
 )
 
 REQUEST_DURATION_SECONDS = Histogram(
@@ -33,18 +70,90 @@ REQUEST_DURATION_SECONDS = Histogram(
     ['method', 'endpoint']
 )
 
+# Bound once so the ingest path skips the per-call attribute lookups.
+_inc_data_points_received = DATA_POINTS_RECEIVED.inc
+_inc_anomalies_detected = ANOMALIES_DETECTED.inc
+_set_active_anomalies = ACTIVE_ANOMALIES.set
+
+_REQUEST_TIMERS = {
+    'get_data': REQUEST_DURATION_SECONDS.labels(method='GET', endpoint='/data'),
+    'receive_sensor_data': REQUEST_DURATION_SECONDS.labels(method='POST', endpoint='/sensor_data'),
+    'receive_sensor_batch': REQUEST_DURATION_SECONDS.labels(method='POST', endpoint='/sensor_data/batch')
+}
+
+FEATURES = ('temperature', 'humidity', 'pressure', 'vibration')
+STATUS_MESSAGES = ("Normal", "Detected", "Model not loaded")
+_STATUS_CODES = {message: code for code, message in enumerate(STATUS_MESSAGES)}
+
 MAX_DATA_POINTS = 100
-current_data = [] 
+# Recent readings are kept column-wise in fixed-size rings: a column-major
+# float64 block of features (one contiguous column per sensor), plus
+# timestamps, status codes and sequence numbers. _window_head is the next
+# slot to write. Features stay float64 so /data returns exactly the values that were
+# posted; float32 would turn large readings into inf (encoded as null) and
+# perturb the rest relative to the anomalies list.
+_window = np.zeros((MAX_DATA_POINTS, len(FEATURES)), dtype=np.float64, order='F')
+_window_timestamps = np.zeros(MAX_DATA_POINTS, dtype=np.float64)
+_window_statuses = np.zeros(MAX_DATA_POINTS, dtype=np.uint8)
+_window_seqs = np.zeros(MAX_DATA_POINTS, dtype=np.int64)
+_window_head = 0
+_window_count = 0
 anomalies = []    
+# Sequence numbers parallel to anomalies, for ?since= lookups.
+_anomaly_seqs = []
+# Every stored reading gets the next sequence number in arrival order, and
+# ?since= is driven by it rather than by timestamps, which clients supply
+# and which need not arrive in order. Starting from the clock in
+# microseconds keeps numbers increasing across restarts, so a dashboard
+# polling with an old ?since= still sees new readings.
+_next_seq = time.time_ns() // 1000
+# Batch readings stamped further ahead of the server clock are rejected.
+MAX_CLOCK_SKEW_MS = 5000
+
+# Bumped on every accepted reading so /data can reuse its last encoding.
+_data_lock = threading.Lock()
+_data_version = 0
+_data_cache = (None, b'')
+_data_etag_prefix = os.urandom(4).hex()
+# Keep the lock consistent across the fork gunicorn does after preloading.
+os.register_at_fork(before=_data_lock.acquire, after_in_parent=_data_lock.release, after_in_child=_data_lock.release)
+
+# An anomaly counts as active for this long after it was detected.
+ACTIVE_ANOMALY_TTL_SECONDS = 60
+_active_anomalies = 0
+_active_anomaly_expiries = deque()
 
 model = None 
+predictor = None
+anomaly_threshold = None
+
+# The model scores in float32; larger magnitudes would overflow to inf there.
+SensorValue = Annotated[float, msgspec.Meta(ge=float(-np.finfo(np.float32).max), le=float(np.finfo(np.float32).max))]
+
+class SensorReading(msgspec.Struct):
+    temperature: SensorValue
+    humidity: SensorValue
+    pressure: SensorValue
+    vibration: SensorValue
+
+class TimestampedSensorReading(SensorReading):
+    timestamp: float
+
+# Readings waiting to be scored are coalesced into a single predict call.
+SCORING_BATCH_SIZE = 64
+# Repeated readings, rounded to this many decimals, reuse a cached verdict.
+PREDICTION_CACHE_SIZE = 4096
+PREDICTION_CACHE_DECIMALS = 3
+_scoring_queue = None
+_scoring_batch = np.empty((SCORING_BATCH_SIZE, len(FEATURES)), dtype=np.float64)
+# Each request thread reuses one event and result slot for its submissions.
+_scoring_slots = threading.local()
 
 def load_model():
     global model
     if os.path.exists(MODEL_PATH):
         try:
-            with open(MODEL_PATH, 'rb') as f:
-                model = pickle.load(f)
+            model = joblib.load(MODEL_PATH, mmap_mode='r')
             print(f"ML model loaded successfully from {MODEL_PATH}")
         except Exception as e:
             print(f"Error loading ML model from {MODEL_PATH}: {e}")
@@ -52,22 +161,148 @@ def load_model():
     else:
         print(f"ML model not found at {MODEL_PATH}. Please run model_trainer.py first.")
         model = None
-
-load_model()
-
-def detect_anomaly(data_point):
+    load_predictor()
+    _predict_cached.cache_clear()
+
+def load_predictor():
+    global predictor, anomaly_threshold
+    predictor = None
+    if model is None or tl2cgen is None or not os.path.exists(PREDICTOR_PATH):
+        return
+    if os.path.getmtime(PREDICTOR_PATH) < os.path.getmtime(MODEL_PATH):
+        print(f"Compiled predictor at {PREDICTOR_PATH} is older than {MODEL_PATH}. Falling back to scikit-learn.")
+        return
+    try:
+        predictor = tl2cgen.Predictor(PREDICTOR_PATH)
+        # Treelite reports the raw anomaly score, the negation of score_samples.
+        anomaly_threshold = -model.offset_
+        print(f"Compiled predictor loaded successfully from {PREDICTOR_PATH}")
+    except Exception as e:
+        print(f"Error loading compiled predictor from {PREDICTOR_PATH}: {e}")
+        predictor = None
+
+def predict_anomalies(batch):
+    if predictor is not None:
+        scores = predictor.predict(tl2cgen.DMatrix(batch)).reshape(-1)
+        return scores > anomaly_threshold
+    return model.predict(batch) == -1
+
+def _window_slots():
+    return (np.arange(_window_count) + _window_head - _window_count) % MAX_DATA_POINTS
+
+def _window_records(slots):
+    return [
+        dict(zip(FEATURES, values), timestamp=timestamp, is_anomaly=STATUS_MESSAGES[status] == "Detected", status=STATUS_MESSAGES[status], seq=seq)
+        for values, timestamp, status, seq in zip(
+            _window[slots].tolist(),
+            _window_timestamps[slots].tolist(),
+            _window_statuses[slots].tolist(),
+            _window_seqs[slots].tolist()
+        )
+    ]
+
+def _scoring_worker():
+    while True:
+        pending = [_scoring_queue.get()]
+        try:
+            count = len(pending[0][0])
+            while count < SCORING_BATCH_SIZE:
+                try:
+                    item = _scoring_queue.get_nowait()
+                except queue.Empty:
+                    break
+                pending.append(item)
+                count += len(item[0])
+
+            if count <= SCORING_BATCH_SIZE:
+                batch = _scoring_batch[:count]
+            else:
+                batch = np.empty((count, len(FEATURES)), dtype=np.float64)
+            batch[:] = [row for rows, _, _ in pending for row in rows]
+            flags = predict_anomalies(batch).tolist()
+
+            start = 0
+            for rows, _, result in pending:
+                result.append(flags[start:start + len(rows)])
+                start += len(rows)
+        except Exception as e:
+            # Any failure goes back to every waiter; the thread must keep running.
+            for _, _, result in pending:
+                result[:] = [[e]]
+        finally:
+            for _, done, _ in pending:
+                done.set()
+
+def start_scoring_worker():
+    global _scoring_queue
+    _scoring_queue = queue.Queue()
+    threading.Thread(target=_scoring_worker, name='anomaly-scorer', daemon=True).start()
+
+start_scoring_worker()
+# gunicorn preloads the app and forks afterwards; threads do not survive a fork.
+os.register_at_fork(after_in_child=start_scoring_worker)
+
+def _expire_active_anomalies():
+    global _active_anomalies
+    while True:
+        time.sleep(1)
+        now = time.monotonic()
+        with _data_lock:
+            expired = 0
+            while _active_anomaly_expiries and _active_anomaly_expiries[0] <= now:
+                _active_anomaly_expiries.popleft()
+                expired += 1
+            if expired:
+                _active_anomalies -= expired
+                _set_active_anomalies(_active_anomalies)
+
+def start_anomaly_expiry():
+    threading.Thread(target=_expire_active_anomalies, name='anomaly-expiry', daemon=True).start()
+
+start_anomaly_expiry()
+os.register_at_fork(after_in_child=start_anomaly_expiry)
+
+def _scoring_slot():
+    slot = getattr(_scoring_slots, 'slot', None)
+    if slot is None:
+        slot = _scoring_slots.slot = (threading.Event(), [])
+    return slot
+
+def _score_rows(rows):
+    done, result = _scoring_slot()
+    done.clear()
+    result.clear()
+    _scoring_queue.put((rows, done, result))
+    done.wait()
+    flags = result[0]
+    if isinstance(flags[0], Exception):
+        raise flags[0]
+    return flags
+
+def _round_row(row):
+    return tuple(round(value, PREDICTION_CACHE_DECIMALS) for value in row)
+
+@lru_cache(maxsize=PREDICTION_CACHE_SIZE)
+def _predict_cached(row):
+    return _score_rows((row,))[0]
+
+def detect_anomaly(row):
     if model is None:
         return False, "Model not loaded"
 
-    df = pd.DataFrame([data_point], columns=['temperature', 'humidity', 'pressure', 'vibration'])
-    
-    prediction = model.predict(df)
-    is_anomaly = bool(prediction[0] == -1)
+    is_anomaly = _predict_cached(_round_row(row))
     return is_anomaly, "Detected" if is_anomaly else "Normal"
 
-@app.route('/')
-def index():
-    html_template = """
+def detect_anomalies(rows):
+    if model is None:
+        return [(False, "Model not loaded")] * len(rows)
+
+    flags = _score_rows([_round_row(row) for row in rows])
+    return [(is_anomaly, "Detected" if is_anomaly else "Normal") for is_anomaly in flags]
+
+load_model()
+
+HTML_TEMPLATE = """
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -156,11 +391,25 @@ def index():
             const dataStreamDiv = document.getElementById('data-stream');
             const anomalyListDiv = document.getElementById('anomaly-list');
             const dataHistoryTableBody = document.getElementById('data-history-table-body');
+            const MAX_DATA_POINTS = 100;
+            const recentData = [];
+            const anomalyData = [];
+            let lastSeq = null;
 
             async function fetchData() {
                 try {
-                    const response = await fetch('/data');
-                    const result = await response.json();
+                    const url = lastSeq === null ? '/data' : `/data?since=${lastSeq}`;
+                    const response = await fetch(url);
+                    const delta = await response.json();
+                    const isNew = record => lastSeq === null || record.seq > lastSeq;
+
+                    recentData.push(...delta.recent_data.filter(isNew));
+                    recentData.splice(0, Math.max(0, recentData.length - MAX_DATA_POINTS));
+                    anomalyData.push(...delta.anomalies.filter(isNew));
+                    if (recentData.length > 0) {
+                        lastSeq = recentData[recentData.length - 1].seq;
+                    }
+                    const result = { recent_data: recentData, anomalies: anomalyData };
 
                     dataStreamDiv.innerHTML = ''; 
                     if (result.recent_data.length > 0) {
@@ -224,55 +473,172 @@ def index():
     </body>
     </html>
     """
-    return render_template_string(html_template)
+
+_INDEX_BYTES = HTML_TEMPLATE.encode('utf-8')
+_INDEX_ETAG = hashlib.sha1(_INDEX_BYTES).hexdigest()
+# Precompressed bodies in order of preference.
+_INDEX_ENCODINGS = {}
+if brotli is not None:
+    _INDEX_ENCODINGS['br'] = brotli.compress(_INDEX_BYTES)
+_INDEX_ENCODINGS['gzip'] = gzip.compress(_INDEX_BYTES, compresslevel=9)
+
+@app.route('/')
+def index():
+    encoding = request.accept_encodings.best_match(list(_INDEX_ENCODINGS))
+    if encoding is None:
+        response = Response(_INDEX_BYTES, mimetype='text/html')
+        response.set_etag(_INDEX_ETAG)
+    else:
+        response = Response(_INDEX_ENCODINGS[encoding], mimetype='text/html')
+        response.headers['Content-Encoding'] = encoding
+        response.set_etag(f"{_INDEX_ETAG}-{encoding}")
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'public, max-age=86400'
+    return response.make_conditional(request)
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def observe_request_duration(response):
+    timer = _REQUEST_TIMERS.get(request.endpoint)
+    if timer is not None:
+        timer.observe(time.perf_counter() - g.request_start)
+    return response
 
 @app.route('/data', methods=['GET'])
-@REQUEST_DURATION_SECONDS.labels(method='GET', endpoint='/data').time()
 def get_data():
-    return jsonify({
-        'recent_data': current_data,
-        'anomalies': anomalies
-    })
+    global _data_cache
+    etag = f"{_data_etag_prefix}-{_data_version}"
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        return response
+
+    since = request.args.get('since', type=int)
+    with _data_lock:
+        if since is not None:
+            version = _data_version
+            slots = _window_slots()
+            start = np.searchsorted(_window_seqs[slots], since, side='right')
+            anomaly_start = bisect.bisect_right(_anomaly_seqs, since)
+            body = orjson.dumps({
+                'recent_data': _window_records(slots[start:]),
+                'anomalies': anomalies[anomaly_start:]
+            })
+        else:
+            version, body = _data_cache
+            if version != _data_version:
+                body = orjson.dumps({
+                    'recent_data': _window_records(_window_slots()),
+                    'anomalies': anomalies
+                })
+                version = _data_version
+                _data_cache = (version, body)
+
+    response = Response(body, mimetype='application/json')
+    response.set_etag(f"{_data_etag_prefix}-{version}", weak=True)
+    return response
+
+def store_readings(entries):
+    # entries are (reading, row, timestamp, is_anomaly, status_message) in arrival order.
+    global _data_version, _window_head, _window_count, _active_anomalies, _next_seq
+    detected = []
+    with _data_lock:
+        for reading, row, timestamp, is_anomaly, status_message in entries:
+            seq = _next_seq
+            _next_seq += 1
+            _window[_window_head] = row
+            _window_timestamps[_window_head] = timestamp
+            _window_statuses[_window_head] = _STATUS_CODES[status_message]
+            _window_seqs[_window_head] = seq
+            _window_head = (_window_head + 1) % MAX_DATA_POINTS
+            _window_count = min(_window_count + 1, MAX_DATA_POINTS)
+            if is_anomaly:
+                data = msgspec.structs.asdict(reading)
+                data['timestamp'] = timestamp
+                data['is_anomaly'] = is_anomaly
+                data['status'] = status_message
+                data['seq'] = seq
+                anomalies.append(data)
+                _anomaly_seqs.append(seq)
+                _active_anomalies += 1
+                _active_anomaly_expiries.append(time.monotonic() + ACTIVE_ANOMALY_TTL_SECONDS)
+                _set_active_anomalies(_active_anomalies)
+                detected.append(data)
+        _data_version += 1
+
+    for data in detected:
+        _inc_anomalies_detected()
+        logger.info("ANOMALY DETECTED: %s", data)
 
 @app.route('/sensor_data', methods=['POST'])
-@REQUEST_DURATION_SECONDS.labels(method='POST', endpoint='/sensor_data').time()
 def receive_sensor_data():
-    DATA_POINTS_RECEIVED.inc() 
+    _inc_data_points_received() 
 
-    data = request.json
-    if not data:
+    try:
+        reading = msgspec.json.decode(request.get_data(cache=False), type=SensorReading)
+    except msgspec.ValidationError as e:
+        return jsonify({"status": "error", "message": f"Invalid sensor data fields: {e}"}), 400
+    except msgspec.DecodeError:
         return jsonify({"status": "error", "message": "No JSON data received"}), 400
 
     try:
-        required_fields = ['temperature', 'humidity', 'pressure', 'vibration']
-        if not all(field in data for field in required_fields):
-            return jsonify({"status": "error", "message": "Missing required sensor data fields"}), 400
+        timestamp = time.time() * 1000 
+        row = msgspec.structs.astuple(reading)
+        is_anomaly, status_message = detect_anomaly(row)
+        store_readings([(reading, row, timestamp, is_anomaly, status_message)])
 
-        data['timestamp'] = time.time() * 1000 
+        return jsonify({"status": "success", "message": "Data received and processed", "is_anomaly": is_anomaly})
 
-        is_anomaly, status_message = detect_anomaly(data)
-        data['is_anomaly'] = is_anomaly
-        data['status'] = status_message
+    except Exception as e:
+        logger.error("An unhandled exception occurred in /sensor_data: %s", e)
+        return jsonify({"status": "error", "message": f"Internal Server Error: {e}"}), 500
 
-        current_data.append(data)
-        if len(current_data) > MAX_DATA_POINTS:
-            current_data.pop(0) 
+@app.route('/sensor_data/batch', methods=['POST'])
+def receive_sensor_batch():
+    try:
+        readings = msgspec.json.decode(request.get_data(cache=False), type=list[TimestampedSensorReading])
+    except msgspec.ValidationError as e:
+        return jsonify({"status": "error", "message": f"Invalid sensor data fields: {e}"}), 400
+    except msgspec.DecodeError:
+        return jsonify({"status": "error", "message": "No JSON data received"}), 400
+    if not readings:
+        return jsonify({"status": "error", "message": "Empty sensor data batch"}), 400
+    latest_allowed = time.time() * 1000 + MAX_CLOCK_SKEW_MS
+    if any(reading.timestamp > latest_allowed for reading in readings):
+        return jsonify({"status": "error", "message": "Sensor data timestamp is in the future"}), 400
 
-        if is_anomaly:
-            anomalies.append(data)
-            ANOMALIES_DETECTED.inc()
-            print(f"ANOMALY DETECTED: {data}")
-        
-        ACTIVE_ANOMALIES.set(len(anomalies))
+    _inc_data_points_received(len(readings))
 
-        return jsonify({"status": "success", "message": "Data received and processed", "is_anomaly": is_anomaly})
+    try:
+        rows = [msgspec.structs.astuple(reading)[:len(FEATURES)] for reading in readings]
+        results = detect_anomalies(rows)
+        store_readings([
+            (reading, row, reading.timestamp, is_anomaly, status_message)
+            for reading, row, (is_anomaly, status_message) in zip(readings, rows, results)
+        ])
+
+        return jsonify({
+            "status": "success",
+            "message": "Batch received and processed",
+            "is_anomaly": [is_anomaly for is_anomaly, _ in results]
+        })
 
     except Exception as e:
-        print(f"An unhandled exception occurred in /sensor_data: {e}")
+        logger.error("An unhandled exception occurred in /sensor_data/batch: %s", e)
         return jsonify({"status": "error", "message": f"Internal Server Error: {e}"}), 500
 
+def make_metrics_app():
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return make_wsgi_app(registry)
+    return make_wsgi_app()
+
 app.wsgi_app = DispatcherMiddleware(app.wsgi_app, {
-    '/metrics': make_wsgi_app()
+    '/metrics': make_metrics_app()
 })
 
 if __name__ == '__main__':
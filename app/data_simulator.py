@@ -1,11 +1,29 @@
-import requests
+import aiohttp
+import asyncio
+import logging
+import os
+import sys
 import time
-import random
-import json
+import numpy as np
+from numpy.random import default_rng
+import orjson
 
-FLASK_APP_URL = "http://localhost:5000/sensor_data"
+FLASK_APP_URL = os.getenv("FLASK_APP_URL", "http://localhost:5000/sensor_data")
 SEND_INTERVAL_SECONDS = 1
 ANOMALY_PROBABILITY = 0.15 
+# Readings are buffered and posted together to the batch endpoint.
+BATCH_SIZE = 10
+BATCH_URL = f"{FLASK_APP_URL}/batch"
+# A hung app must not pile up pending sends, so every POST is bounded.
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=2.0, connect=0.5)
+MAX_RETRIES = 2
+RETRY_BACKOFF_SECONDS = 0.1
+RETRY_STATUSES = frozenset((502, 503, 504))
+
+logger = logging.getLogger('data_simulator')
+logger.setLevel(logging.INFO)
+logger.propagate = False
+logger.addHandler(logging.StreamHandler(sys.stdout))
 
 NORMAL_RANGES = {
     'temperature': {'min': 20.0, 'max': 25.0, 'std_dev': 1.0},
@@ -21,57 +39,149 @@ ANOMALY_RANGES = {
     'vibration': {'min': 5.0, 'max': 10.0, 'std_dev': 2.0}
 }
 
+SENSOR_NAMES = tuple(NORMAL_RANGES)
+# Readings are drawn ahead of time in bulk and handed out one row per tick.
+POOL_SIZE = 4096
+
+RNG = default_rng(seed=42)
+
+# Per-sensor distribution parameters, in SENSOR_NAMES order.
+MIDS_NORMAL = np.array([(props['min'] + props['max']) / 2 for props in NORMAL_RANGES.values()])
+SDS_NORMAL = np.array([props['std_dev'] for props in NORMAL_RANGES.values()])
+LOS_NORMAL = np.array([props['min'] for props in NORMAL_RANGES.values()])
+HIS_NORMAL = np.array([props['max'] for props in NORMAL_RANGES.values()])
+
+MIDS_ANOMALY = np.array([(props['min'] + props['max']) / 2 for props in ANOMALY_RANGES.values()])
+SDS_ANOMALY = np.array([props['std_dev'] for props in ANOMALY_RANGES.values()])
+LOS_ANOMALY = np.array([props['min'] for props in ANOMALY_RANGES.values()])
+HIS_ANOMALY = np.array([props['max'] for props in ANOMALY_RANGES.values()])
+
+def generate_pool(mids, sds, los, his):
+    # Drawn directly in float32 and scaled and clipped in place: one allocation per pool.
+    pool = RNG.standard_normal(size=(POOL_SIZE, len(SENSOR_NAMES)), dtype=np.float32)
+    pool *= sds
+    pool += mids
+    return np.clip(pool, los, his, out=pool)
+
+NORMAL_POOL = generate_pool(MIDS_NORMAL, SDS_NORMAL, LOS_NORMAL, HIS_NORMAL)
+ANOMALY_POOL = generate_pool(MIDS_ANOMALY, SDS_ANOMALY, LOS_ANOMALY, HIS_ANOMALY)
+_pool_index = 0
+
+# Batch buffer layout: one record per reading, posted as JSON objects.
+BATCH_DTYPE = np.dtype([(name, np.float32) for name in SENSOR_NAMES] + [('timestamp', np.float64)])
+
 def generate_sensor_data(is_anomaly=False):
-    data = {}
-    ranges = ANOMALY_RANGES if is_anomaly else NORMAL_RANGES
-
-    for sensor, props in ranges.items():
-        midpoint = (props['min'] + props['max']) / 2
-        value = random.gauss(midpoint, props['std_dev'])
-        data[sensor] = max(props['min'], min(props['max'], value))
-    
-    return data
-
-def send_data():
-    print(f"Starting data simulation. Sending data to {FLASK_APP_URL} every {SEND_INTERVAL_SECONDS} seconds...")
-    print(f"Anomaly probability: {ANOMALY_PROBABILITY * 100}%")
+    global _pool_index, NORMAL_POOL, ANOMALY_POOL
+    if _pool_index == POOL_SIZE:
+        NORMAL_POOL = generate_pool(MIDS_NORMAL, SDS_NORMAL, LOS_NORMAL, HIS_NORMAL)
+        ANOMALY_POOL = generate_pool(MIDS_ANOMALY, SDS_ANOMALY, LOS_ANOMALY, HIS_ANOMALY)
+        _pool_index = 0
+
+    pool = ANOMALY_POOL if is_anomaly else NORMAL_POOL
+    values = pool[_pool_index]
+    _pool_index += 1
+    return values
 
+# Anomaly coin flips are drawn the same way, as a boolean mask per pool.
+ANOMALY_MASK = RNG.random(POOL_SIZE) < ANOMALY_PROBABILITY
+_mask_index = 0
+
+def next_anomaly_event():
+    global _mask_index, ANOMALY_MASK
+    if _mask_index == POOL_SIZE:
+        ANOMALY_MASK = RNG.random(POOL_SIZE) < ANOMALY_PROBABILITY
+        _mask_index = 0
+
+    is_anomaly = bool(ANOMALY_MASK[_mask_index])
+    _mask_index += 1
+    return is_anomaly
+
+def encode_batch(batch):
+    # orjson cannot serialise structured arrays, and the app expects one JSON
+    # object per reading, so records are turned into dicts only at flush time.
+    # The dicts are returned too, for logging once the buffer has been reused.
+    records = [dict(zip(BATCH_DTYPE.names, record)) for record in batch.tolist()]
+    return orjson.dumps(records), records
+
+async def post_batch(session, body):
+    for attempt in range(MAX_RETRIES + 1):
+        if attempt:
+            await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+        try:
+            async with session.post(BATCH_URL, data=body, headers={'Content-Type': 'application/json'}) as response:
+                if response.status in RETRY_STATUSES and attempt < MAX_RETRIES:
+                    continue
+                if response.status >= 400:
+                    logger.error("HTTP Error: %s - %s", response.status, await response.text())
+                    return None
+                return orjson.loads(await response.read())
+        except asyncio.TimeoutError:
+            raise
+        except aiohttp.ClientConnectionError:
+            if attempt == MAX_RETRIES:
+                raise
+
+async def send_batch(session, body, records, anomaly_events):
     try:
-        while True:
-            is_anomaly_event = random.random() < ANOMALY_PROBABILITY
-            sensor_data = generate_sensor_data(is_anomaly=is_anomaly_event)
+        response_json = await post_batch(session, body)
+        if response_json is None or not logger.isEnabledFor(logging.INFO):
+            return
+        status = response_json.get("status", "unknown")
+        detected_anomalies = response_json.get("is_anomaly", [False] * len(anomaly_events))
 
-            json_data = json.dumps(sensor_data)
+        for sensor_data, is_anomaly_event, detected_anomaly in zip(records, anomaly_events, detected_anomalies):
+            logger.info("Sent %s: %s -> App Status: %s, Detected: %s",
+                        "ANOMALY" if is_anomaly_event else "NORMAL", sensor_data, status, detected_anomaly)
 
-            try:
-                response = requests.post(FLASK_APP_URL, json=sensor_data)
-                response.raise_for_status()
+    except asyncio.TimeoutError:
+        logger.error("Timeout Error: Flask app at %s did not respond within %s seconds", BATCH_URL, REQUEST_TIMEOUT.total)
+    except aiohttp.ClientConnectionError as e:
+        logger.error("Connection Error: Could not connect to Flask app at %s. Is the app running? Error: %s", BATCH_URL, e)
+    except orjson.JSONDecodeError:
+        logger.error("JSON Decode Error: Could not parse response from %s", BATCH_URL)
+    except Exception as e:
+        logger.error("An unexpected error occurred: %s", e)
 
-                response_json = response.json()
-                status = response_json.get("status", "unknown")
-                message = response_json.get("message", "No message")
-                detected_anomaly = response_json.get("is_anomaly", False)
+async def send_data():
+    print(f"Starting data simulation. Sending data to {BATCH_URL} every {SEND_INTERVAL_SECONDS * BATCH_SIZE} seconds in batches of {BATCH_SIZE}...")
+    print(f"Anomaly probability: {ANOMALY_PROBABILITY * 100}%")
 
-                if is_anomaly_event:
-                    print(f"Sent ANOMALY: {json_data} -> App Status: {status}, Detected: {detected_anomaly}")
-                else:
-                    print(f"Sent NORMAL: {json_data} -> App Status: {status}, Detected: {detected_anomaly}")
+    # Sends run as tasks so a slow response never delays the next tick.
+    pending = set()
+    # Readings are written straight into a fixed record buffer that is reused
+    # every batch; it is serialised before being handed to a send task.
+    batch = np.zeros(BATCH_SIZE, dtype=BATCH_DTYPE)
+    filled = 0
+    anomaly_events = []
+    loop = asyncio.get_running_loop()
+    # Ticks are scheduled against a fixed monotonic target so time spent
+    # generating and queueing a reading does not stretch the interval.
+    next_tick = loop.time()
+    async with aiohttp.ClientSession(timeout=REQUEST_TIMEOUT) as session:
+        while True:
+            is_anomaly_event = next_anomaly_event()
+            batch[filled] = (*generate_sensor_data(is_anomaly=is_anomaly_event), time.time() * 1000)
+            anomaly_events.append(is_anomaly_event)
+            filled += 1
 
-            except requests.exceptions.ConnectionError as e:
-                print(f"Connection Error: Could not connect to Flask app at {FLASK_APP_URL}. Is the app running? Error: {e}")
-            except requests.exceptions.HTTPError as e:
-                print(f"HTTP Error: {e.response.status_code} - {e.response.text}")
-            except json.JSONDecodeError:
-                print(f"JSON Decode Error: Could not parse response from {FLASK_APP_URL}")
-            except Exception as e:
-                print(f"An unexpected error occurred: {e}")
+            if filled == BATCH_SIZE:
+                body, records = encode_batch(batch)
+                task = asyncio.create_task(send_batch(session, body, records, anomaly_events))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+                filled = 0
+                anomaly_events = []
 
-            time.sleep(SEND_INTERVAL_SECONDS)
+            next_tick += SEND_INTERVAL_SECONDS
+            await asyncio.sleep(max(0, next_tick - loop.time()))
 
+def main():
+    try:
+        asyncio.run(send_data())
     except KeyboardInterrupt:
         print("\nData simulation stopped by user.")
     except Exception as e:
         print(f"An error occurred in the main simulation loop: {e}")
 
 if __name__ == "__main__":
-    send_data()
+    main()
@@ -0,0 +1,30 @@
+import os
+import shutil
+from prometheus_client import multiprocess
+
+bind = '0.0.0.0:5000'
+# Readings and anomalies are held in each worker's memory, so the dashboard
+# only sees one worker's share of the stream when this is raised.
+workers = int(os.getenv('GUNICORN_WORKERS', '1'))
+# Threaded workers keep /metrics scrapes and dashboard polls from queueing
+# behind sensor posts.
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+# Longer than the dashboard's 2s poll interval so its connection is reused.
+keepalive = 5
+# Load the model once in the master so workers share its pages copy-on-write.
+preload_app = True
+
+# Reset the Prometheus multiprocess directory here rather than in a server
+# hook: with preload_app the app (and its metric files) is imported before
+# on_starting runs. The marker keeps a SIGHUP config reload from wiping the
+# files the running master and workers still hold open.
+multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+if multiproc_dir and not os.environ.get('GUNICORN_MULTIPROC_DIR_READY'):
+    shutil.rmtree(multiproc_dir, ignore_errors=True)
+    os.makedirs(multiproc_dir)
+    os.environ['GUNICORN_MULTIPROC_DIR_READY'] = '1'
+
+def child_exit(server, worker):
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        multiprocess.mark_process_dead(worker.pid)
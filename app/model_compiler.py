@@ -0,0 +1,40 @@
+import joblib
+import os
+import treelite
+import tl2cgen
+from model_trainer import MODEL_PATH, NUM_NORMAL_SAMPLES, TRAINING_NORMAL_RANGES, generate_synthetic_data
+
+# Must match app.py, which loads the predictor from next to the model.
+PREDICTOR_PATH = os.path.splitext(MODEL_PATH)[0] + '.so'
+ANNOTATION_PATH = 'iso_branches_annotation.json'
+PARALLEL_COMP = os.cpu_count() or 1
+
+
+def compile_model():
+    if not os.path.exists(MODEL_PATH):
+        print(f"ML model not found at {MODEL_PATH}. Please run model_trainer.py first.")
+        return
+
+    model = joblib.load(MODEL_PATH)
+
+    print("Converting Isolation Forest model with Treelite...")
+    tl_model = treelite.sklearn.import_model(model)
+
+    print("Annotating branches with synthetic normal data...")
+    sample, _ = generate_synthetic_data(NUM_NORMAL_SAMPLES, TRAINING_NORMAL_RANGES)
+    tl2cgen.annotate_branch(tl_model, tl2cgen.DMatrix(sample), ANNOTATION_PATH)
+
+    print(f"Compiling native predictor to {PREDICTOR_PATH}...")
+    try:
+        tl2cgen.export_lib(
+            tl_model,
+            toolchain='gcc',
+            libpath=PREDICTOR_PATH,
+            params={'parallel_comp': PARALLEL_COMP, 'annotate_in': ANNOTATION_PATH}
+        )
+        print(f"Predictor compiled successfully to {PREDICTOR_PATH}")
+    except Exception as e:
+        print(f"Error compiling predictor to {PREDICTOR_PATH}: {e}")
+
+if __name__ == "__main__":
+    compile_model()
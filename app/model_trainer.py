@@ -1,14 +1,15 @@
-import pandas as pd
 import numpy as np
+from numpy.random import default_rng
 from sklearn.ensemble import IsolationForest
-import pickle
+import joblib
 import os
-import random
 
-MODEL_PATH = 'model.pkl'
+MODEL_PATH = os.getenv('MODEL_PATH', 'model.joblib')
 NUM_NORMAL_SAMPLES = 1000
 NUM_ANOMALY_SAMPLES = 50 
 
+RNG = default_rng(seed=42)
+
 TRAINING_NORMAL_RANGES = {
     'temperature': {'min': 20.0, 'max': 25.0, 'std_dev': 1.0},
     'humidity': {'min': 40.0, 'max': 60.0, 'std_dev': 5.0},
@@ -25,29 +26,28 @@ TRAINING_ANOMALY_RANGES = {
 
 
 def generate_synthetic_data(num_samples, ranges, is_anomaly=False):
-    data = {}
-    for sensor, props in ranges.items():
-        midpoint = (props['min'] + props['max']) / 2
-        values = [random.gauss(midpoint, props['std_dev']) for _ in range(num_samples)]
-        data[sensor] = [max(props['min'], min(props['max'], v)) for v in values]
-    return pd.DataFrame(data)
+    mids = np.array([(props['min'] + props['max']) / 2 for props in ranges.values()])
+    sds = np.array([props['std_dev'] for props in ranges.values()])
+    los = np.array([props['min'] for props in ranges.values()])
+    his = np.array([props['max'] for props in ranges.values()])
+    values = RNG.standard_normal(size=(num_samples, len(ranges)), dtype=np.float32)
+    values *= sds
+    values += mids
+    np.clip(values, los, his, out=values)
+    return values, list(ranges)
 
 def train_model():
     print("Generating synthetic training data...")
-    normal_data = generate_synthetic_data(NUM_NORMAL_SAMPLES, TRAINING_NORMAL_RANGES)
-    
-    features = ['temperature', 'humidity', 'pressure', 'vibration']
-    X_train = normal_data[features]
+    X_train, features = generate_synthetic_data(NUM_NORMAL_SAMPLES, TRAINING_NORMAL_RANGES)
 
-    print(f"Training Isolation Forest model with {len(X_train)} normal samples...")
-    model = IsolationForest(contamination=0.01, random_state=42)
+    print(f"Training Isolation Forest model with {len(X_train)} normal samples over {', '.join(features)}...")
+    model = IsolationForest(n_estimators=100, contamination=0.01, random_state=42, n_jobs=-1)
     
     model.fit(X_train)
     print("Model training complete.")
 
     try:
-        with open(MODEL_PATH, 'wb') as f:
-            pickle.dump(model, f)
+        joblib.dump(model, MODEL_PATH, compress=0)
         print(f"Model saved successfully to {MODEL_PATH}")
     except Exception as e:
         print(f"Error saving model to {MODEL_PATH}: {e}")
@@ -0,0 +1,102 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+import orjson
+
+NORMAL_READING = {'temperature': 22.0, 'humidity': 50.0, 'pressure': 1008.0, 'vibration': 1.2}
+ANOMALY_READING = {'temperature': 35.0, 'humidity': 90.0, 'pressure': 985.0, 'vibration': 8.0}
+
+
+class IncrementalDataTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.model_dir = tempfile.TemporaryDirectory()
+        os.environ['MODEL_PATH'] = os.path.join(cls.model_dir.name, 'model.joblib')
+        import model_trainer
+        model_trainer.train_model()
+        import app
+        cls.client = app.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.model_dir.cleanup()
+
+    def test_stale_anomaly_is_returned_incrementally(self):
+        response = self.client.post('/sensor_data', json=NORMAL_READING)
+        self.assertEqual(response.status_code, 200)
+        last_seq = orjson.loads(self.client.get('/data').data)['recent_data'][-1]['seq']
+
+        stale_timestamp = time.time() * 1000 - 60_000
+        stale = dict(ANOMALY_READING, timestamp=stale_timestamp)
+        response = self.client.post('/sensor_data/batch', data=orjson.dumps([stale]), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['is_anomaly'], [True])
+
+        response = self.client.get('/data', query_string={'since': last_seq})
+        self.assertEqual(response.status_code, 200)
+        delta = orjson.loads(response.data)
+        self.assertEqual(len(delta['recent_data']), 1)
+        self.assertEqual(delta['recent_data'][0]['timestamp'], stale_timestamp)
+        self.assertEqual(delta['recent_data'][0]['status'], 'Detected')
+        self.assertEqual(len(delta['anomalies']), 1)
+        self.assertEqual(delta['anomalies'][0]['timestamp'], stale_timestamp)
+
+        response = self.client.get('/data')
+        self.assertEqual(response.status_code, 200)
+
+    def test_future_timestamp_is_rejected(self):
+        future = dict(NORMAL_READING, timestamp=time.time() * 1000 + 3_600_000)
+        response = self.client.post('/sensor_data/batch', data=orjson.dumps([future]), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post('/sensor_data', json=NORMAL_READING)
+        self.assertEqual(response.status_code, 200)
+        last_seq = orjson.loads(self.client.get('/data').data)['recent_data'][-1]['seq']
+        response = self.client.post('/sensor_data', json=NORMAL_READING)
+        delta = orjson.loads(self.client.get('/data', query_string={'since': last_seq}).data)
+        self.assertEqual(len(delta['recent_data']), 1)
+
+
+def _import_tree(stderr):
+    # -X importtime lines end in "| <indent>module"; children precede parents.
+    entries = []
+    for line in stderr.splitlines():
+        if line.startswith('import time:') and not line.rstrip().endswith('imported package'):
+            field = line.rsplit('|', 1)[-1]
+            entries.append((len(field) - len(field.lstrip()), field.strip()))
+    return entries
+
+
+def _importers(entries, index):
+    depth = entries[index][0]
+    for later_depth, name in entries[index + 1:]:
+        if later_depth < depth:
+            depth = later_depth
+            yield name
+
+
+class ImportTest(unittest.TestCase):
+    def test_no_pandas_import(self):
+        with tempfile.TemporaryDirectory() as model_dir:
+            env = dict(os.environ, MODEL_PATH=os.path.join(model_dir, 'model.joblib'))
+            app_dir = os.path.dirname(os.path.abspath(__file__))
+            subprocess.run([sys.executable, 'model_trainer.py'], cwd=app_dir, env=env, check=True, capture_output=True)
+            result = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', 'import app; assert app.model is not None'],
+                cwd=app_dir, env=env, capture_output=True, text=True
+            )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        entries = _import_tree(result.stderr)
+        for index, (_, name) in enumerate(entries):
+            if name.split('.')[0] == 'pandas':
+                # Newer scikit-learn releases probe for pandas when it happens to be
+                # installed; it is not in requirements.txt, so only that is tolerated.
+                importers = list(_importers(entries, index))
+                self.assertTrue(any(importer.split('.')[0] == 'sklearn' for importer in importers), importers)
+
+if __name__ == '__main__':
+    unittest.main()